@@ -0,0 +1,254 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+
+_STREAM_END = object()
+
+
+class ChatBusyError(Exception):
+    """Raised when too many chat requests are already waiting for the backend."""
+
+
+class ChatTimeoutError(Exception):
+    """Raised when a chat request did not finish within the runner's timeout."""
+
+
+class StubChatBackend:
+    """
+    Answers after a fixed delay without any network call, for local testing
+    and load tests (AI_CHAT_BACKEND=stub).
+    """
+
+    def __init__(self, latency=1.0, reply=None, token_delay=0.05):
+        self.latency = float(latency)
+        self.reply = reply
+        self.token_delay = float(token_delay)
+
+    def _reply_for(self, messages):
+        if self.reply is not None:
+            return self.reply
+        return f"[stub reply] {messages[-1]['content'][:200]}"
+
+    async def complete(self, messages, **params):
+        await asyncio.sleep(self.latency)
+        return self._reply_for(messages)
+
+    async def stream(self, messages, **params):
+        # latency until the first token, then token_delay between words
+        await asyncio.sleep(self.latency)
+        for index, word in enumerate(self._reply_for(messages).split(" ")):
+            if index:
+                await asyncio.sleep(self.token_delay)
+            yield word if index == 0 else " " + word
+
+    async def aclose(self):
+        pass
+
+
+class OpenAIChatBackend:
+    """
+    Chat completions through the async OpenAI client over one bounded,
+    keep-alive connection pool shared by every request in the process.
+    """
+
+    def __init__(self, api_key, timeout=30.0, max_connections=20):
+        self.api_key = api_key
+        self.timeout = float(timeout)
+        self.max_connections = int(max_connections)
+        self._client = None
+
+    def _get_client(self):
+        # Created on the runner's loop, which the pool is then bound to
+        if self._client is None:
+            import httpx
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                timeout=self.timeout,
+                max_retries=1,
+                http_client=httpx.AsyncClient(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    )
+                )
+            )
+        return self._client
+
+    async def complete(self, messages, **params):
+        response = await self._get_client().chat.completions.create(messages=messages, **params)
+        return response.choices[0].message.content.strip()
+
+    async def stream(self, messages, **params):
+        response = await self._get_client().chat.completions.create(messages=messages, stream=True, **params)
+        try:
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Also runs on cancellation, dropping the upstream connection
+            await response.close()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+class AsyncChatRunner:
+    """
+    Runs chat completions on one background asyncio loop per process.
+
+    Request threads hand their call to the loop and wait on a future, so an
+    upstream call costs a coroutine instead of a worker. At most
+    max_concurrency calls reach the backend at once; up to max_pending may
+    be queued or running, beyond that submit() fails fast with
+    ChatBusyError. timeout bounds queueing plus the backend call; for
+    streams it bounds the wait for each chunk instead.
+
+    The loop thread starts on first use, so a runner created before
+    gunicorn forks only starts in the workers.
+    """
+
+    def __init__(self, backend, max_concurrency=10, max_pending=50, timeout=30.0):
+        self.backend = backend
+        self.max_concurrency = int(max_concurrency)
+        self.max_pending = int(max_pending)
+        self.timeout = float(timeout)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._semaphore = None
+        self.pending = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.rejected = 0
+        # (time to first token, total) in seconds for recent completed streams
+        self.stream_latencies = deque(maxlen=1000)
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="ai-chat-loop", daemon=True)
+                thread.start()
+                self._semaphore = asyncio.run_coroutine_threadsafe(self._make_semaphore(), loop).result()
+                self._loop = loop
+            return self._loop
+
+    async def _make_semaphore(self):
+        return asyncio.Semaphore(self.max_concurrency)
+
+    async def _limited(self, call):
+        async with self._semaphore:
+            return await call()
+
+    async def _run(self, call, timeout):
+        try:
+            result = await asyncio.wait_for(self._limited(call), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise ChatTimeoutError(f"AI backend did not answer within {timeout:g}s")
+        except Exception:
+            self.errors += 1
+            raise
+        self.completed += 1
+        return result
+
+    def submit(self, call, timeout=None):
+        """
+        Schedule call() (a coroutine function) on the loop and return a
+        concurrent.futures.Future for its result. timeout defaults to the
+        runner's timeout; pass 0 for no limit.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        loop = self._ensure_loop()
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise ChatBusyError("Too many AI chat requests in progress, please retry shortly")
+            self.pending += 1
+        future = asyncio.run_coroutine_threadsafe(self._run(call, timeout or None), loop)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future):
+        with self._lock:
+            self.pending -= 1
+
+    def complete(self, messages, **params):
+        """Blocking helper for request threads: submit a completion and wait for the reply."""
+        return self.submit(lambda: self.backend.complete(messages, **params)).result()
+
+    def stream(self, messages, **params):
+        """
+        Start a streamed completion and return a generator of text chunks for
+        the request thread. Busy errors are raised here, before any output;
+        closing the generator early (client gone) cancels the upstream call.
+        """
+        chunks = queue.Queue()
+
+        async def pump():
+            async for chunk in self.backend.stream(messages, **params):
+                chunks.put(chunk)
+
+        started = time.perf_counter()
+        future = self.submit(pump, timeout=0)
+        future.add_done_callback(lambda _future: chunks.put(_STREAM_END))
+        return self._iter_stream(future, chunks, started)
+
+    def _iter_stream(self, future, chunks, started):
+        first_token_at = None
+        try:
+            while True:
+                try:
+                    chunk = chunks.get(timeout=self.timeout)
+                except queue.Empty:
+                    self.timeouts += 1
+                    raise ChatTimeoutError(f"AI backend sent nothing for {self.timeout:g}s")
+                if chunk is _STREAM_END:
+                    break
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield chunk
+            future.result()  # re-raise backend errors
+            finished = time.perf_counter()
+            self.stream_latencies.append((
+                (first_token_at or finished) - started,
+                finished - started
+            ))
+        finally:
+            future.cancel()
+
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "max_concurrency": self.max_concurrency,
+            "max_pending": self.max_pending,
+            "timeout": self.timeout,
+            "pending": self.pending,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "streams": {
+                "count": len(self.stream_latencies),
+                "first_token_ms": _percentiles([ttft for ttft, _ in self.stream_latencies]),
+                "total_ms": _percentiles([total for _, total in self.stream_latencies])
+            }
+        }
+
+
+def _percentiles(seconds):
+    if not seconds:
+        return None
+    ordered = sorted(seconds)
+
+    def at(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 1)
+
+    return {"p50": at(0.5), "p95": at(0.95), "max": at(1.0)}
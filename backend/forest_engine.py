@@ -0,0 +1,82 @@
+import numpy as np
+
+
+class CompiledForest:
+    """
+    Pure-NumPy inference for a RandomForestRegressor exported by
+    ml_model/data_preparation.py (export_forest).
+
+    All trees live in flat arrays (feature, threshold, children, value);
+    every tree of every input row is walked one level per step, so a batch
+    costs max_depth vectorized steps instead of n_trees Python calls.
+    Predictions match RandomForestRegressor.predict exactly.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth, feature_names=()):
+        # Node k is addressed as 2 * k everywhere, so the child to visit is
+        # children[2 * k + went_left] without an extra multiply per step.
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names)
+        self.n_estimators = len(roots)
+        self.n_features_in_ = len(self.feature_names) or int(feature.max()) + 1
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            feature = data["feature"].astype(np.intp)
+            threshold = data["threshold"].astype(np.float64)
+            left = data["left"].astype(np.intp)
+            right = data["right"].astype(np.intp)
+            value = data["value"].astype(np.float64)
+            roots = data["roots"].astype(np.intp)
+            max_depth = int(data["max_depth"])
+            feature_names = [str(name) for name in data["feature_names"]]
+
+        # Leaves point to themselves, so extra traversal steps are no-ops
+        # and every row can take exactly max_depth steps.
+        leaves = left < 0
+        node_ids = np.arange(len(feature), dtype=np.intp)
+        left = np.where(leaves, node_ids, left)
+        right = np.where(leaves, node_ids, right)
+        feature = np.where(leaves, 0, feature)
+
+        # scikit-learn compares float32 inputs against float64 thresholds.
+        # Rounding each threshold down to the nearest float32 gives the same
+        # decisions while keeping the whole traversal in float32.
+        threshold32 = threshold.astype(np.float32)
+        too_high = threshold32.astype(np.float64) > threshold
+        threshold32[too_high] = np.nextafter(threshold32[too_high], np.float32(-np.inf))
+
+        children = np.empty(2 * len(feature), dtype=np.intp)
+        children[0::2] = 2 * right
+        children[1::2] = 2 * left
+        return cls(
+            np.repeat(feature, 2), np.repeat(threshold32, 2), children,
+            np.repeat(value, 2), 2 * roots, max_depth, feature_names
+        )
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_samples, n_features = X.shape
+        if n_features != self.n_features_in_:
+            raise ValueError(f"X has {n_features} features, but the model expects {self.n_features_in_}")
+
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_samples, dtype=np.intp) * n_features)[:, None]
+        nodes = np.tile(self.roots, (n_samples, 1))
+        for _ in range(self.max_depth):
+            feature_index = self.feature.take(nodes)
+            if n_samples > 1:
+                feature_index += row_offsets
+            went_left = flat_X.take(feature_index) <= self.threshold.take(nodes)
+            nodes = self.children.take(nodes + went_left)
+
+        # cumsum adds tree by tree, the same order as scikit-learn, so results are bit-identical
+        return np.cumsum(self.value.take(nodes), axis=1)[:, -1] / self.n_estimators
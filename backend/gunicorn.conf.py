@@ -0,0 +1,28 @@
+# Picked up automatically by `gunicorn app:app` (see Procfile).
+
+import os
+
+# Import the app once in the master process; workers are forked from it.
+preload_app = True
+
+# Threaded workers: a request waiting on the AI chat loop or an open
+# /messages/stream holds a thread, not a whole worker process, so /login and
+# the dashboards keep being served. app.py sizes the stream and AI chat
+# limits from this thread count so RESERVED_THREADS (8) always stay free,
+# and refuses to start if explicit limits would not fit.
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+
+
+def pre_fork(server, worker):
+    # Load the model in the master so every worker shares it copy-on-write
+    # instead of each one loading it on its first prediction.
+    import app
+    app.get_model()
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with workers
+    import app
+    with app.app.app_context():
+        app.db.engine.dispose(close=False)
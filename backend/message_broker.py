@@ -0,0 +1,134 @@
+import json
+import logging
+import queue
+import select
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class MessageBroker:
+    """
+    In-process pub/sub for chat events, addressed by user id.
+
+    Every open stream (see /messages/stream) holds one subscriber queue; an
+    event published for a user is copied into that user's queues only, so
+    the cost of a message is proportional to the streams that want it.
+    Slow subscribers that stop draining their queue lose the oldest events
+    instead of growing without bound.
+    """
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id):
+        subscriber = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_ids, event):
+        with self._lock:
+            targets = [s for user_id in set(user_ids) for s in self._subscribers.get(user_id, ())]
+        for subscriber in targets:
+            while True:
+                try:
+                    subscriber.put_nowait(event)
+                    break
+                except queue.Full:
+                    try:
+                        subscriber.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+        self.published += 1
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def stats(self):
+        return {
+            "connections": self.connection_count(),
+            "users": len(self._subscribers),
+            "published": self.published,
+            "dropped": self.dropped
+        }
+
+
+class PostgresNotifyListener:
+    """
+    Bridges Postgres NOTIFY to a local MessageBroker so events reach streams
+    held by every gunicorn worker, not only the one that handled the write.
+
+    Writers call pg_notify(channel, payload) inside their transaction (the
+    notification is only delivered if it commits); payload is JSON
+    {"to": [user ids], "event": {...}}. One background thread per process
+    keeps a dedicated connection LISTENing and reconnects on errors.
+    Works with psycopg2 and psycopg 3.
+    """
+
+    def __init__(self, engine, channel, broker):
+        self.engine = engine
+        self.channel = channel
+        self.broker = broker
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="chat-notify-listener", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("Chat notification listener failed, reconnecting")
+                time.sleep(1)
+
+    def _listen(self):
+        pooled = self.engine.raw_connection()
+        conn = pooled.driver_connection
+        pooled.detach()  # never handed back to the pool
+        try:
+            conn.autocommit = True
+            cursor = conn.cursor()
+            cursor.execute(f'LISTEN "{self.channel}"')
+            if hasattr(conn, "poll"):
+                # psycopg2
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._dispatch(conn.notifies.pop(0).payload)
+            else:
+                # psycopg 3
+                for notify in conn.notifies():
+                    self._dispatch(notify.payload)
+        finally:
+            conn.close()
+
+    def _dispatch(self, payload):
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed chat notification")
+            return
+        self.broker.publish(data.get("to", []), data.get("event"))
@@ -0,0 +1,35 @@
+-- Indexes for the hot lookup paths and the uniqueness the code already assumes
+-- (one grade per student/subject/exam_type, one participation score per week).
+
+-- Refuse to add the unique constraints while duplicates exist; resolve them by hand first.
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM grades GROUP BY student_id, subject_id, exam_type HAVING count(*) > 1
+    ) THEN
+        RAISE EXCEPTION 'grades has duplicate (student_id, subject_id, exam_type) rows';
+    END IF;
+    IF EXISTS (
+        SELECT 1 FROM participation GROUP BY student_id, subject_id, week_number HAVING count(*) > 1
+    ) THEN
+        RAISE EXCEPTION 'participation has duplicate (student_id, subject_id, week_number) rows';
+    END IF;
+END $$;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_grades_student_subject_exam') THEN
+        ALTER TABLE grades
+            ADD CONSTRAINT uq_grades_student_subject_exam UNIQUE (student_id, subject_id, exam_type);
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_participation_student_subject_week') THEN
+        ALTER TABLE participation
+            ADD CONSTRAINT uq_participation_student_subject_week UNIQUE (student_id, subject_id, week_number);
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS ix_attendance_student_status ON attendance (student_id, status);
+CREATE INDEX IF NOT EXISTS ix_messages_sender_receiver_read_sent ON messages (sender_id, receiver_id, is_read, sent_at);
+CREATE INDEX IF NOT EXISTS ix_student_subjects_class_id ON student_subjects (class_id);
+CREATE INDEX IF NOT EXISTS ix_student_subjects_student_id ON student_subjects (student_id);
+CREATE INDEX IF NOT EXISTS ix_homework_class_id ON homework (class_id);
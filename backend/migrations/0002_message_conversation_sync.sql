@@ -0,0 +1,12 @@
+-- Incremental conversation sync: when each message was read, and indexes that
+-- serve both directions of a teacher-student thread from one key range.
+
+-- Messages read before this migration keep a NULL read_at; they are already
+-- read on every client, so there is no read-state change to replay.
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS read_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS ix_messages_conversation_sent
+    ON messages (LEAST(sender_id, receiver_id), GREATEST(sender_id, receiver_id), sent_at, id);
+CREATE INDEX IF NOT EXISTS ix_messages_conversation_read
+    ON messages (LEAST(sender_id, receiver_id), GREATEST(sender_id, receiver_id), read_at)
+    WHERE read_at IS NOT NULL;
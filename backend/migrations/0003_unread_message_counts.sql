@@ -0,0 +1,22 @@
+-- Unread message counters per (receiver, sender), maintained on send and
+-- mark-read, replacing COUNT(*) over messages for every unread badge.
+
+CREATE TABLE IF NOT EXISTS unread_message_counts (
+    receiver_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    sender_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    unread_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (receiver_id, sender_id)
+);
+
+-- Hold off sends and reads while counting so the backfill is exact, then
+-- overwrite whatever counters the application already wrote.
+LOCK TABLE messages IN SHARE MODE;
+
+UPDATE unread_message_counts SET unread_count = 0;
+
+INSERT INTO unread_message_counts (receiver_id, sender_id, unread_count)
+SELECT receiver_id, sender_id, count(*)
+FROM messages
+WHERE is_read = false
+GROUP BY receiver_id, sender_id
+ON CONFLICT (receiver_id, sender_id) DO UPDATE SET unread_count = EXCLUDED.unread_count;
@@ -0,0 +1,42 @@
+-- Persistent notification feed with a per-user read cursor.
+
+CREATE TABLE IF NOT EXISTS notifications (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    kind VARCHAR(20) NOT NULL,
+    source_id INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_notifications_user_created
+    ON notifications (user_id, created_at) INCLUDE (id, kind);
+
+CREATE TABLE IF NOT EXISTS notification_cursors (
+    user_id INTEGER PRIMARY KEY REFERENCES users (id) ON DELETE CASCADE,
+    last_read_id INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT now()
+);
+
+-- Seed the feed with the last day of activity so the bell is not empty after
+-- the upgrade. Skipped if the application has already written notifications.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM notifications) THEN
+        INSERT INTO notifications (user_id, kind, source_id, created_at)
+        SELECT receiver_id, 'message', id, sent_at
+        FROM messages
+        WHERE sent_at >= now() - interval '1 day';
+
+        INSERT INTO notifications (user_id, kind, source_id, created_at)
+        SELECT DISTINCT s.user_id, 'homework', h.id, h.created_at
+        FROM homework h
+        JOIN student_subjects ss ON ss.class_id = h.class_id
+        JOIN students s ON s.id = ss.student_id
+        WHERE h.created_at >= now() - interval '1 day';
+
+        INSERT INTO notifications (user_id, kind, source_id, created_at)
+        SELECT s.user_id, 'grade', g.id, g.recorded_at
+        FROM grades g
+        JOIN students s ON s.id = g.student_id
+        WHERE g.recorded_at >= now() - interval '1 day';
+    END IF;
+END $$;
@@ -0,0 +1,25 @@
+-- Seat counter per class, kept in step with student_subjects by the
+-- allocator, and one class per (subject, teacher, class_number).
+
+ALTER TABLE classes ADD COLUMN IF NOT EXISTS student_count INTEGER NOT NULL DEFAULT 0;
+
+-- Refuse to add the unique constraint while duplicates exist; resolve them by hand first.
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM classes GROUP BY subject_id, teacher_id, class_number HAVING count(*) > 1
+    ) THEN
+        RAISE EXCEPTION 'classes has duplicate (subject_id, teacher_id, class_number) rows';
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_classes_subject_teacher_number') THEN
+        ALTER TABLE classes
+            ADD CONSTRAINT uq_classes_subject_teacher_number UNIQUE (subject_id, teacher_id, class_number);
+    END IF;
+END $$;
+
+-- Hold off enrollments while counting so the backfill is exact.
+LOCK TABLE student_subjects IN SHARE MODE;
+
+UPDATE classes SET student_count = (
+    SELECT count(*) FROM student_subjects WHERE student_subjects.class_id = classes.id
+);
@@ -0,0 +1,65 @@
+-- Per-student prediction features, maintained by every attendance,
+-- participation and grade write, replacing the aggregates over the raw
+-- history. Same computation as `flask rebuild-student-features`.
+
+CREATE TABLE IF NOT EXISTS student_features (
+    student_id INTEGER PRIMARY KEY REFERENCES students (id) ON DELETE CASCADE,
+    attendance_total INTEGER NOT NULL DEFAULT 0,
+    attendance_present INTEGER NOT NULL DEFAULT 0,
+    attendance_late INTEGER NOT NULL DEFAULT 0,
+    participation_week_avg_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    participation_weeks INTEGER NOT NULL DEFAULT 0,
+    grade_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    grade_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS student_participation_weeks (
+    student_id INTEGER NOT NULL REFERENCES students (id) ON DELETE CASCADE,
+    week_number INTEGER NOT NULL,
+    score_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    score_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (student_id, week_number)
+);
+
+-- Hold off attendance, participation and grade writes while counting so the
+-- backfill is exact, then overwrite whatever the application already wrote.
+LOCK TABLE attendance, participation, grades IN SHARE MODE;
+LOCK TABLE student_participation_weeks, student_features IN SHARE ROW EXCLUSIVE MODE;
+
+DELETE FROM student_participation_weeks;
+DELETE FROM student_features;
+
+INSERT INTO student_participation_weeks (student_id, week_number, score_sum, score_count)
+SELECT student_id, week_number, sum(participation_score * 10), count(*)
+FROM participation
+GROUP BY student_id, week_number;
+
+INSERT INTO student_features (
+    student_id, attendance_total, attendance_present, attendance_late,
+    participation_week_avg_sum, participation_weeks, grade_sum, grade_count
+)
+SELECT
+    s.id,
+    coalesce(a.total, 0),
+    coalesce(a.present, 0),
+    coalesce(a.late, 0),
+    coalesce(p.week_avg_sum, 0),
+    coalesce(p.weeks, 0),
+    coalesce(g.grade_sum, 0),
+    coalesce(g.grade_count, 0)
+FROM students s
+LEFT JOIN (
+    SELECT student_id, count(*) AS total,
+           sum(CASE WHEN status = 'Present' THEN 1 ELSE 0 END) AS present,
+           sum(CASE WHEN status = 'Late' THEN 1 ELSE 0 END) AS late
+    FROM attendance GROUP BY student_id
+) a ON a.student_id = s.id
+LEFT JOIN (
+    SELECT student_id, sum(score_sum / score_count) AS week_avg_sum, count(*) AS weeks
+    FROM student_participation_weeks GROUP BY student_id
+) p ON p.student_id = s.id
+LEFT JOIN (
+    SELECT student_id, sum(score) AS grade_sum, count(*) AS grade_count
+    FROM grades GROUP BY student_id
+) g ON g.student_id = s.id;
@@ -0,0 +1,19 @@
+-- Notifications are deleted with the homework they announce, and replaced
+-- when the grade they announce is edited; both look them up by source.
+
+CREATE INDEX IF NOT EXISTS ix_notifications_kind_source
+    ON notifications (kind, source_id);
+
+-- Notifications of homework deleted before this migration
+DELETE FROM notifications n
+WHERE n.kind = 'homework'
+  AND NOT EXISTS (SELECT 1 FROM homework h WHERE h.id = n.source_id);
+
+-- Keep only the newest notification of each edited grade
+DELETE FROM notifications n
+USING notifications newer
+WHERE n.kind = 'grade'
+  AND newer.kind = 'grade'
+  AND newer.user_id = n.user_id
+  AND newer.source_id = n.source_id
+  AND newer.id > n.id;
@@ -0,0 +1,209 @@
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class HashingBusyError(Exception):
+    """Raised when too many password hashes are already queued, or one timed out."""
+
+
+def normalize_method(method):
+    """
+    A werkzeug method string with the parameters it leaves out filled in the
+    way werkzeug reads them ("pbkdf2" is "pbkdf2:sha256:<its default
+    iterations>", "scrypt" is "scrypt:32768:8:1"), so equal settings compare equal.
+    """
+    name, *args = method.split(":")
+    try:
+        if name == "pbkdf2" and len(args) <= 2:
+            hash_name = args[0] if args else "sha256"
+            iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+            return f"pbkdf2:{hash_name}:{iterations}"
+        if name == "scrypt" and len(args) in (0, 3):
+            n, r, p = map(int, args) if args else (2**15, 8, 1)
+            return f"scrypt:{n}:{r}:{p}"
+    except ValueError:
+        pass
+    return method
+
+
+class PasswordHasher:
+    """
+    Password hashing on a small process pool, so a CPU-bound KDF never
+    runs in (or holds the GIL of) a request thread.
+
+    method is a full werkzeug method string, e.g. "scrypt:32768:8:1" or
+    "pbkdf2:sha256:600000"; hashes stored with other parameters report
+    needs_rehash() so they can be upgraded on the next successful login.
+    At most max_pending hashes may be queued or running before callers get
+    HashingBusyError; a hash still running when its caller gives up after
+    timeout seconds keeps its slot until it finishes. workers=0 hashes
+    inline (CLI commands, tests).
+
+    The pool starts on first use with the forkserver start method, so it is
+    created inside each gunicorn worker and never forks a threaded process.
+    As with any non-fork pool, the __main__ module must be safe to import.
+    """
+
+    def __init__(self, method="scrypt:32768:8:1", workers=2, max_pending=64, timeout=10.0):
+        self.method = normalize_method(method)
+        self.workers = int(workers)
+        self.max_pending = int(max_pending)
+        self.timeout = float(timeout)
+        self._pool = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.hashed = 0
+        self.verified = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._pool
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingBusyError("Too many sign-ins in progress, please retry shortly")
+            self.pending += 1
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            self._finished(None)
+            raise
+        # The slot is freed when the hash is done, not when its caller stops waiting
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        with self._lock:
+            self.pending -= 1
+
+    def _result(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise HashingBusyError("Password hashing timed out, please retry shortly") from None
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        return self._result(self._submit(fn, *args))
+
+    def hash(self, password):
+        self.hashed += 1
+        return self._run(generate_password_hash, password, self.method)
+
+    def hash_many(self, passwords):
+        """
+        Hash a batch for bulk user creation. Every hash goes through the same
+        admission as sign-ins, and at most one per worker is queued at a
+        time, so a sign-in never waits behind more than one round of a
+        large import.
+        """
+        passwords = list(passwords)
+        self.hashed += len(passwords)
+        if not self.workers:
+            return [generate_password_hash(password, self.method) for password in passwords]
+        hashes, in_flight = [], deque()
+        try:
+            for password in passwords:
+                if len(in_flight) >= self.workers:
+                    hashes.append(self._result(in_flight.popleft()))
+                in_flight.append(self._submit(generate_password_hash, password, self.method))
+            while in_flight:
+                hashes.append(self._result(in_flight.popleft()))
+        except HashingBusyError:
+            for future in in_flight:
+                future.cancel()
+            raise
+        return hashes
+
+    def verify(self, stored_hash, password):
+        self.verified += 1
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        return normalize_method(stored_hash.split("$", 1)[0]) != normalize_method(self.method)
+
+    def stats(self):
+        return {
+            "method": self.method.split(":", 1)[0],
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "hashed": self.hashed,
+            "verified": self.verified,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out
+        }
+
+
+class LoginThrottle:
+    """
+    Sliding-window limit on login attempts per key (an account or an IP).
+
+    An attempt is counted before the password is checked and forgiven if it
+    succeeds, so only failures and attempts still in flight use up the
+    limit: a flood of guesses is refused before it reaches the hasher,
+    while many students signing in successfully from one school network
+    are never blocked. Keys are kept LRU-bounded to max_keys.
+    """
+
+    def __init__(self, limit, window, max_keys=100000):
+        self.limit = int(limit)
+        self.window = float(window)
+        self.max_keys = int(max_keys)
+        self._attempts = OrderedDict()
+        self._lock = threading.Lock()
+        self.blocked = 0
+
+    def acquire(self, key):
+        """
+        Count an attempt for key. Returns a token to pass to forgive(), or
+        None with the attempt refused when the key is over its limit.
+        """
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if attempts is None:
+                attempts = self._attempts[key] = deque()
+                while len(self._attempts) > self.max_keys:
+                    self._attempts.popitem(last=False)
+            self._attempts.move_to_end(key)
+            while attempts and attempts[0] <= now - self.window:
+                attempts.popleft()
+            if len(attempts) >= self.limit:
+                self.blocked += 1
+                return None
+            attempts.append(now)
+            return now
+
+    def forgive(self, key, token):
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if attempts is not None:
+                try:
+                    attempts.remove(token)
+                except ValueError:
+                    pass
+
+    def retry_after(self, key):
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if not attempts:
+                return 0
+            return max(1, int(attempts[0] + self.window - time.monotonic()) + 1)
@@ -0,0 +1,69 @@
+import json
+import time
+
+import pytest
+
+from ai_chat import AsyncChatRunner, ChatBusyError, ChatTimeoutError, StubChatBackend
+
+
+def test_tutor_reply_comes_from_the_stub_and_is_cached(app, client, make_school):
+    student_id = make_school(students=1)["student_ids"][0]
+    assert app.AI_CHAT_BACKEND == "stub"
+
+    first = client.post("/student-ai-chat", json={"student_id": student_id, "message": "How do I study?"})
+    again = client.post("/student-ai-chat", json={"student_id": student_id, "message": "how do I study"})
+
+    assert first.status_code == 200
+    assert first.get_json() == {"response": "[stub reply] How do I study?"}
+    assert again.get_json() == {"response": "[stub reply] How do I study?", "cached": True}
+
+
+def test_tutor_reply_streams_tokens_as_sse(client, make_school):
+    student_id = make_school(students=1)["student_ids"][0]
+
+    response = client.post("/student-ai-chat/stream", json={"student_id": student_id, "message": "Help with fractions"})
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    events = [block for block in response.get_data(as_text=True).split("\n\n") if block]
+    tokens = [json.loads(block[len("data: "):])["token"] for block in events[:-1]]
+    assert "".join(tokens) == "[stub reply] Help with fractions"
+    assert events[-1].startswith("event: done\n")
+    assert json.loads(events[-1].split("data: ", 1)[1])["cached"] is False
+
+
+def test_tutor_reply_streams_ndjson_when_asked(client, make_school):
+    student_id = make_school(students=1)["student_ids"][0]
+
+    response = client.post("/student-ai-chat/stream", json={"student_id": student_id, "message": "Hi"},
+                           headers={"Accept": "application/x-ndjson"})
+
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[0] == {"token": "[stub"}
+    assert lines[-1]["done"] is True
+
+
+def test_tutor_chat_requires_student_and_message(client):
+    response = client.post("/student-ai-chat", json={"message": "Hi"})
+
+    assert response.status_code == 400
+
+
+def test_runner_rejects_calls_beyond_max_pending():
+    runner = AsyncChatRunner(StubChatBackend(latency=0.5), max_concurrency=1, max_pending=1, timeout=5)
+    future = runner.submit(lambda: runner.backend.complete([{"content": "first"}]))
+
+    with pytest.raises(ChatBusyError):
+        runner.complete([{"content": "second"}])
+    assert future.result() == "[stub reply] first"
+    assert runner.stats()["rejected"] == 1
+
+
+def test_runner_times_out_slow_backend():
+    runner = AsyncChatRunner(StubChatBackend(latency=1.0), timeout=0.05)
+
+    started = time.perf_counter()
+    with pytest.raises(ChatTimeoutError):
+        runner.complete([{"content": "slow"}])
+    assert time.perf_counter() - started < 1.0
+    assert runner.stats()["timeouts"] == 1
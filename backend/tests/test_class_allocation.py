@@ -0,0 +1,96 @@
+import threading
+
+from sqlalchemy import func
+
+
+def run_threads(count, target):
+    errors = []
+
+    def run(index):
+        try:
+            target(index)
+        except Exception as e:  # surfaced by the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=120)
+    assert not any(thread.is_alive() for thread in threads), "threads still waiting (deadlock?)"
+    assert not errors, errors
+
+
+def class_occupancy(app):
+    """(subject_id, class_number, student_count, enrolled) for every class."""
+    with app.app.app_context():
+        enrolled = app.db.session.query(func.count(app.StudentSubjects.id)) \
+            .filter(app.StudentSubjects.class_id == app.Classes.id).scalar_subquery()
+        return app.db.session.query(
+            app.Classes.subject_id, app.Classes.class_number, app.Classes.student_count, enrolled
+        ).order_by(app.Classes.subject_id, app.Classes.class_number).all()
+
+
+def assert_packed(rows):
+    capacity = 20
+    for subject_id in {row[0] for row in rows}:
+        classes = [row for row in rows if row[0] == subject_id]
+        assert [row[1] for row in classes] == list(range(1, len(classes) + 1))
+        assert all(student_count == enrolled for _, _, student_count, enrolled in classes)
+        assert all(enrolled == capacity for *_, enrolled in classes[:-1])
+        assert 0 < classes[-1][3] <= capacity
+
+
+def test_concurrent_enrollments_fill_classes_in_order(app, make_school):
+    school = make_school(subjects=2)
+
+    def enroll(index):
+        response = app.app.test_client().post("/admin/add-student", json={
+            "name": f"Student {index}", "email": f"student{index}@school.test",
+            "password": "pw", "subjects": list(reversed(school["subject_ids"]))
+        })
+        assert response.status_code == 201, response.get_json()
+
+    run_threads(45, enroll)
+
+    rows = class_occupancy(app)
+    assert_packed(rows)
+    assert sum(row[3] for row in rows) == 90
+
+
+def test_concurrent_subject_swaps_do_not_deadlock(app, make_school):
+    school = make_school(students=2, subjects=3)
+    first, second, third = school["subject_ids"]
+
+    def swap(index):
+        client = app.app.test_client()
+        student_id = school["student_ids"][index]
+        # The two students change the same subjects in opposite orders
+        subjects = [second, third] if index == 0 else [third, second]
+        for round_ in range(20):
+            wanted = subjects if round_ % 2 == 0 else [subjects[1], first]
+            response = client.put(f"/admin/update-student/{student_id}", json={"subjects": wanted})
+            assert response.status_code == 200, response.get_json()
+
+    run_threads(2, swap)
+
+    with app.app.app_context():
+        seats = app.db.session.query(func.sum(app.Classes.student_count)).scalar()
+        assert seats == app.StudentSubjects.query.count()
+
+
+def test_enrollment_in_a_subject_without_teacher_is_refused(app, client, make_school):
+    make_school()
+    with app.app.app_context():
+        subject = app.Subjects(name="Untaught")
+        app.db.session.add(subject)
+        app.db.session.commit()
+        subject_id = subject.id
+
+    response = client.post("/admin/add-student", json={
+        "name": "Student", "email": "student@school.test", "password": "pw", "subjects": [subject_id]
+    })
+
+    assert response.status_code == 400
+    assert "no teacher" in response.get_json()["error"]
+    assert class_occupancy(app) == []
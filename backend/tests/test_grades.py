@@ -0,0 +1,47 @@
+import pytest
+
+
+@pytest.mark.parametrize("payload, error", [
+    ({"student_id": "abc", "score": 50}, "student_id and subject_id must be integers"),
+    ({"student_id": 1, "score": "abc"}, "Score must be a number"),
+    ({"student_id": 1, "score": {"value": 50}}, "Score must be a number"),
+    ({"student_id": 1, "score": None}, "Score must be a number"),
+    ({"student_id": 1, "score": "nan"}, "Score must be between 0 and 100"),
+    ({"student_id": 1, "score": 101}, "Score must be between 0 and 100"),
+])
+def test_add_grade_rejects_bad_fields(client, make_school, payload, error):
+    make_school(students=1)
+
+    response = client.post("/grades", json={"subject_id": 1, "exam_type": "Midterm", **payload})
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": error}
+
+
+@pytest.mark.parametrize("payload, error", [
+    ({"grades": [{"student_id": 1, "score": 50}, {"student_id": "x", "score": 50}]},
+     "grades[1]: student_id must be an integer"),
+    ({"grades": [{"student_id": 1, "score": [50]}]}, "grades[0]: Score must be a number"),
+    ({"students": [{"student_id": 1, "grades": {"Final": 50}}, {"student_id": 2, "grades": {"Final": "A"}}]},
+     "students[1]: Score must be a number"),
+    ({"students": [{"student_id": 1, "grades": ["Final", 50]}]},
+     "students[0]: grades must map exam types to scores"),
+    ({"grades": ["oops"]}, "grades must be a list of objects"),
+])
+def test_gradebook_rejects_bad_cells_with_their_index(app, client, make_school, payload, error):
+    make_school(students=2)
+
+    response = client.put("/classes/1/gradebook", json={"exam_type": "Final", **payload})
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": error}
+    with app.app.app_context():
+        assert app.Grades.query.count() == 0
+
+
+def test_gradebook_rejects_a_non_object_body(client, make_school):
+    make_school(students=1)
+
+    response = client.put("/classes/1/gradebook", json=[{"student_id": 1, "score": 50}])
+
+    assert response.status_code == 400
@@ -0,0 +1,34 @@
+def notification_rows(app, kind):
+    with app.app.app_context():
+        return app.db.session.query(app.Notifications.user_id, app.Notifications.source_id) \
+            .filter_by(kind=kind).order_by(app.Notifications.id).all()
+
+
+def bell(client, student_id):
+    return {item["id"]: item["content"] for item in client.get(f"/student/{student_id}/notifications").get_json()}
+
+
+def test_deleting_homework_deletes_its_notifications(app, client, make_school):
+    school = make_school(students=3)
+    client.post("/homework", json={"teacher_id": school["teacher_ids"][0], "class_id": 1, "title": "Essay"})
+    assert len(notification_rows(app, "homework")) == 3
+
+    response = client.delete("/homework/1")
+
+    assert response.status_code == 200
+    assert notification_rows(app, "homework") == []
+    assert bell(client, school["student_ids"][0]) == {}
+
+
+def test_editing_a_grade_keeps_one_notification(app, client, make_school):
+    school = make_school(students=1)
+    grade = {"student_id": school["student_ids"][0], "subject_id": school["subject_ids"][0], "exam_type": "Midterm"}
+    client.post("/grades", json={**grade, "score": 60})
+    client.delete(f"/notifications/{grade['student_id']}/clear")
+
+    for score in (70, 80):
+        assert client.put("/grades", json={**grade, "score": score}).status_code == 200
+
+    assert len(notification_rows(app, "grade")) == 1
+    # The cleared grade is announced again after the edit
+    assert bell(client, grade["student_id"]) == {1003: "You have 1 new or updated grade."}
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+
+def walk_pages(client, url, limit):
+    items, after = [], None
+    while True:
+        params = {"limit": limit} if after is None else {"limit": limit, "after": after}
+        response = client.get(url, query_string=params)
+        assert response.status_code == 200, response.get_json()
+        page = response.get_json()
+        assert len(page) <= limit
+        items.extend(page)
+        after = response.headers.get("X-Next-After")
+        if after is None:
+            return items
+
+
+@pytest.mark.parametrize("url", [
+    "/students",
+    "/teachers/{teacher_id}/classes",
+    "/classes/1/students",
+    "/teacher/{teacher_id}/students",
+])
+def test_keyset_pages_add_up_to_the_full_list(client, make_school, url):
+    school = make_school(students=45)
+    url = url.format(teacher_id=school["teacher_ids"][0])
+
+    everything = client.get(url).get_json()
+    paged = walk_pages(client, url, limit=7)
+
+    assert paged == everything
+    assert len({item["id"] for item in paged}) == len(paged)
+
+
+def test_ndjson_page_ends_with_next_after(client, make_school):
+    make_school(students=5)
+
+    response = client.get("/classes/1/students", query_string={"limit": 2, "format": "ndjson"})
+
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line.get("student_id") for line in lines[:2]] == [1, 2]
+    assert lines[2] == {"next_after": 2}
+
+
+def test_invalid_page_args_are_rejected(client, make_school):
+    school = make_school()
+
+    response = client.get(f"/teachers/{school['teacher_ids'][0]}/classes", query_string={"limit": "x"})
+
+    assert response.status_code == 400
@@ -0,0 +1,32 @@
+import pytest
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash
+
+from password_hashing import PasswordHasher, normalize_method
+
+
+@pytest.mark.parametrize("method, normalized", [
+    ("pbkdf2", f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}"),
+    ("pbkdf2:sha512", f"pbkdf2:sha512:{DEFAULT_PBKDF2_ITERATIONS}"),
+    ("pbkdf2:sha256:600000", "pbkdf2:sha256:600000"),
+    ("scrypt", "scrypt:32768:8:1"),
+    ("scrypt:16384:8:1", "scrypt:16384:8:1"),
+    ("scrypt:bad", "scrypt:bad"),
+])
+def test_normalize_method_fills_in_werkzeug_defaults(method, normalized):
+    assert normalize_method(method) == normalized
+
+
+def test_hash_stored_without_parameters_is_not_rehashed_forever():
+    hasher = PasswordHasher(method=f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}", workers=0)
+
+    assert not hasher.needs_rehash("pbkdf2:sha256$salt$digest")
+    assert not hasher.needs_rehash("pbkdf2$salt$digest")
+    assert hasher.needs_rehash("pbkdf2:sha256:1000$salt$digest")
+    assert hasher.needs_rehash("scrypt:32768:8:1$salt$digest")
+
+
+def test_configured_method_is_normalized():
+    hasher = PasswordHasher(method="scrypt", workers=0)
+
+    assert hasher.method == "scrypt:32768:8:1"
+    assert not hasher.needs_rehash(generate_password_hash("pw", "scrypt:32768:8:1"))
@@ -0,0 +1,46 @@
+import pytest
+
+LIST_ENDPOINTS = [
+    "/students",
+    "/teachers",
+    "/teachers/{teacher_id}/classes",
+    "/classes/{class_id}/students",
+    "/teacher/{teacher_id}/students",
+]
+
+
+def query_counts(app, client, school):
+    with app.app.app_context():
+        class_id = app.db.session.query(app.Classes.id).order_by(app.Classes.id).first()[0]
+    counts = {}
+    for endpoint in LIST_ENDPOINTS:
+        response = client.get(endpoint.format(teacher_id=school["teacher_ids"][0], class_id=class_id))
+        assert response.status_code == 200, (endpoint, response.get_json())
+        counts[endpoint] = int(response.headers["X-Query-Count"])
+    return counts
+
+
+def test_list_query_count_does_not_grow_with_rows(app, client, make_school):
+    school = make_school(students=3)
+    few = query_counts(app, client, school)
+
+    for i in range(3, 30):
+        response = client.post("/admin/add-student", json={
+            "name": f"Student {i}", "email": f"student{i}@school.test",
+            "password": "pw", "subjects": school["subject_ids"]
+        })
+        assert response.status_code == 201
+    many = query_counts(app, client, school)
+
+    assert many == few
+    assert max(many.values()) <= 3
+
+
+def test_query_count_limit_fails_the_request_in_testing(app, client, make_school):
+    make_school(students=2)
+    app.app.config["QUERY_COUNT_LIMIT"] = 1
+    try:
+        with pytest.raises(AssertionError, match="issued"):
+            client.get("/teachers/1/classes")
+    finally:
+        app.app.config["QUERY_COUNT_LIMIT"] = None
@@ -0,0 +1,28 @@
+import json
+
+
+def roster(*emails, subject_id):
+    return "\n".join(json.dumps({"name": "Student", "email": email, "password": "pw", "subjects": [subject_id]})
+                     for email in emails)
+
+
+def test_import_refuses_emails_existing_in_another_case(client, make_school):
+    subject_id = make_school(students=1)["subject_ids"][0]
+
+    response = client.post("/admin/students/import?format=ndjson",
+                           data=roster("new@school.test", "STUDENT0@School.Test", subject_id=subject_id))
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid roster: line 2: email STUDENT0@School.Test already exists"
+
+
+def test_import_over_http_is_limited_to_max_rows(app, client, make_school):
+    subject_id = make_school()["subject_ids"][0]
+    emails = [f"student{i}@school.test" for i in range(app.ROSTER_IMPORT_MAX_ROWS + 1)]
+
+    response = client.post("/admin/students/import?format=ndjson", data=roster(*emails, subject_id=subject_id))
+
+    assert response.status_code == 400
+    assert "flask import-roster" in response.get_json()["error"]
+    with app.app.app_context():
+        assert app.Students.query.count() == 0
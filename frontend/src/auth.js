@@ -0,0 +1,87 @@
+// src/auth.js
+// Session tokens for the API. Login stores the access/refresh pair; every
+// axios request then carries "Authorization: Bearer <access token>", and a
+// 401 on an expired access token is retried once after /auth/refresh.
+import axios from "axios";
+
+export const API_URL = "http://127.0.0.1:5000";
+
+const ACCESS_KEY = "accessToken";
+const REFRESH_KEY = "refreshToken";
+
+export function saveSession(data) {
+  // The server returns no tokens when JWT_SECRET is not configured
+  if (data.access_token) localStorage.setItem(ACCESS_KEY, data.access_token);
+  if (data.refresh_token) localStorage.setItem(REFRESH_KEY, data.refresh_token);
+}
+
+export function clearSession() {
+  localStorage.removeItem(ACCESS_KEY);
+  localStorage.removeItem(REFRESH_KEY);
+}
+
+export function getAccessToken() {
+  return localStorage.getItem(ACCESS_KEY);
+}
+
+// For EventSource, which cannot send headers: /messages/stream accepts the
+// access token as a query parameter.
+export function withAccessToken(url) {
+  const token = getAccessToken();
+  if (!token) return url;
+  return `${url}${url.includes("?") ? "&" : "?"}access_token=${encodeURIComponent(token)}`;
+}
+
+// Concurrent 401s share one refresh request
+let refreshing = null;
+
+export function refreshSession() {
+  const refreshToken = localStorage.getItem(REFRESH_KEY);
+  if (!refreshToken) return Promise.reject(new Error("No refresh token"));
+  if (!refreshing) {
+    refreshing = axios
+      .post(`${API_URL}/auth/refresh`, { refresh_token: refreshToken }, { skipAuth: true })
+      .then((res) => {
+        saveSession(res.data);
+        return res.data.access_token;
+      })
+      .catch((err) => {
+        clearSession();
+        throw err;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+}
+
+axios.interceptors.request.use((config) => {
+  const token = getAccessToken();
+  if (token && !config.skipAuth) {
+    config.headers = config.headers || {};
+    config.headers.Authorization = `Bearer ${token}`;
+  }
+  return config;
+});
+
+axios.interceptors.response.use(
+  (response) => response,
+  (error) => {
+    const config = error.config;
+    if (!error.response || error.response.status !== 401 || !config || config.skipAuth) {
+      return Promise.reject(error);
+    }
+    const signIn = () => {
+      clearSession();
+      window.location.assign("/login");
+      return Promise.reject(error);
+    };
+    if (config.retriedAfterRefresh || !localStorage.getItem(REFRESH_KEY)) return signIn();
+    return refreshSession().then((token) => {
+      config.retriedAfterRefresh = true;
+      config.headers.Authorization = `Bearer ${token}`;
+      return axios(config);
+    }, signIn);
+  }
+);
@@ -1,6 +1,7 @@
 // src/components/AdminDashboard/AdminLayout.jsx
 import React, { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
+import { clearSession } from "../../auth";
 
 function AdminLayout({ children }) {
   const navigate = useNavigate();
@@ -16,6 +17,7 @@ function AdminLayout({ children }) {
   const handleLogout = () => {
     localStorage.removeItem("adminName");
     localStorage.removeItem("adminId");
+    clearSession();
     navigate("/login");
   };
 
@@ -1,6 +1,7 @@
 import React, { useState } from "react";
 import axios from "axios";
 import { useNavigate } from "react-router-dom";
+import { saveSession } from "../auth";
 
 function Login() {
   const [email, setEmail] = useState("");
@@ -11,8 +12,10 @@ function Login() {
   const handleLogin = (e) => {
     e.preventDefault();
     setError("");
-    axios.post("http://127.0.0.1:5000/login", { email, password })
+    // skipAuth: a stale token from an earlier session must not be sent
+    axios.post("http://127.0.0.1:5000/login", { email, password }, { skipAuth: true })
       .then((res) => {
+        saveSession(res.data);
         const { role, user_id, name, teacher_id, student_id } = res.data;
         if (role === "admin") {
           localStorage.setItem("adminName", name);
@@ -1,5 +1,6 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import axios from "axios";
+import useMessageStream from "../useMessageStream";
 
 function StudentChat() {
   // Assume these IDs are stored during login
@@ -40,40 +41,47 @@ function StudentChat() {
     }
   }, [studentTableId]);
 
-  // Helper to fetch unread count for a teacher (messages from teacher to student)
-  const fetchUnreadCount = async (teacherUserId) => {
+  // Refs for the stream handlers, which outlive a single render
+  const selectedRef = useRef(null);
+  const lastMessageIdRef = useRef(null);
+  selectedRef.current = selectedTeacher;
+
+  // Fetch every unread count for this student in one call
+  const fetchUnreadCounts = async () => {
     try {
-      const res = await axios.get("http://127.0.0.1:5000/messages/unread_count", {
-        params: {
-          teacher_id: teacherUserId,
-          student_id: studentUserId,
-        },
+      const res = await axios.get("http://127.0.0.1:5000/messages/unread_counts", {
+        params: { user_id: studentUserId },
       });
-      return res.data.unread_count;
+      const counts = {};
+      for (const row of res.data.unread_counts) {
+        counts[row.sender_id] = row.unread_count;
+      }
+      setUnreadCounts(counts);
     } catch (err) {
-      console.error("Error fetching unread count:", err);
-      return 0;
+      console.error("Error fetching unread counts:", err);
     }
   };
 
-  // Fetch unread counts for all teachers
   useEffect(() => {
-    const fetchAllUnread = async () => {
-      const counts = {};
-      for (const teacher of teachers) {
-        const count = await fetchUnreadCount(teacher.user_id);
-        counts[teacher.user_id] = count;
-      }
-      setUnreadCounts(counts);
-    };
-    if (teachers.length) {
-      fetchAllUnread();
+    if (studentUserId) {
+      fetchUnreadCounts();
     }
-  }, [teachers, studentUserId]);
+  }, [studentUserId]);
+
+  // Add messages to the open conversation, skipping ones already shown
+  const appendMessages = (newMessages) => {
+    if (!newMessages.length) return;
+    lastMessageIdRef.current = Math.max(lastMessageIdRef.current || 0, ...newMessages.map((m) => m.id));
+    setMessages((prev) => {
+      const seen = new Set(prev.map((m) => m.id));
+      return [...prev, ...newMessages.filter((m) => !seen.has(m.id))];
+    });
+  };
 
   // When a teacher is selected, fetch messages and mark teacher messages as read
   useEffect(() => {
     if (selectedTeacher) {
+      lastMessageIdRef.current = null;
       fetchMessages();
       markMessagesAsRead();
     }
@@ -89,6 +97,7 @@ function StudentChat() {
           student_id: studentUserId,
         },
       });
+      lastMessageIdRef.current = res.data.length ? res.data[res.data.length - 1].id : 0;
       setMessages(res.data);
     } catch (err) {
       console.error("Error fetching messages:", err);
@@ -96,25 +105,74 @@ function StudentChat() {
     }
   };
 
+  // Fetch only the messages newer than the last one shown (since_id delta)
+  const fetchNewMessages = async () => {
+    const teacher = selectedRef.current;
+    if (!teacher || lastMessageIdRef.current === null) return;
+    try {
+      const res = await axios.get("http://127.0.0.1:5000/student_messages", {
+        params: {
+          teacher_id: teacher.user_id,
+          student_id: studentUserId,
+          since_id: lastMessageIdRef.current,
+        },
+      });
+      if (selectedRef.current === teacher) {
+        appendMessages(res.data.messages);
+        if (res.data.messages.some((m) => m.sender_id === teacher.user_id)) {
+          markMessagesAsRead();
+        }
+      }
+    } catch (err) {
+      console.error("Error fetching new messages:", err);
+    }
+  };
+
   // Function to mark messages as read (for student marking teacher's messages as read)
   const markMessagesAsRead = async () => {
+    const teacher = selectedRef.current;
+    if (!teacher) return;
     try {
       await axios.patch("http://127.0.0.1:5000/messages/mark_read/student", {
-        teacher_id: selectedTeacher.user_id,
+        teacher_id: teacher.user_id,
         student_id: studentUserId,
       });
       // Update unread count for the selected teacher to 0
       setUnreadCounts((prev) => ({
         ...prev,
-        [selectedTeacher.user_id]: 0,
+        [teacher.user_id]: 0,
       }));
     } catch (err) {
       console.error("Error marking messages as read:", err);
     }
   };
 
-  // Optionally, you can set up polling (if desired) to mark messages as read periodically
-  // For simplicity, here we call markMessagesAsRead when conversation is loaded.
+  // New messages and unread counts are pushed by the server; after a
+  // reconnect (or while the stream is unavailable) catch up with a delta
+  useMessageStream(studentUserId, {
+    onMessage: (msg) => {
+      const teacher = selectedRef.current;
+      if (!teacher || (msg.sender_id !== teacher.user_id && msg.receiver_id !== teacher.user_id)) return;
+      if (msg.truncated) {
+        fetchNewMessages();
+        return;
+      }
+      appendMessages([msg]);
+      if (msg.sender_id === teacher.user_id) {
+        markMessagesAsRead();
+      }
+    },
+    onUnread: ({ peer_id, unread_count }) => {
+      const teacher = selectedRef.current;
+      // The open conversation is marked read as its messages arrive
+      if (teacher && teacher.user_id === peer_id) return;
+      setUnreadCounts((prev) => ({ ...prev, [peer_id]: unread_count }));
+    },
+    onCatchUp: () => {
+      fetchNewMessages();
+      fetchUnreadCounts();
+    },
+  });
 
   // Handle sending a new message
   const handleSendMessage = async () => {
@@ -126,8 +184,8 @@ function StudentChat() {
         message: newMessage,
       });
       setNewMessage("");
-      fetchMessages();
-      markMessagesAsRead(); // Immediately mark incoming teacher messages as read
+      // Shows it right away even if the stream is down
+      fetchNewMessages();
     } catch (err) {
       console.error("Error sending message:", err);
       setError("Failed to send message.");
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
+import { clearSession } from "../../auth";
 
 function StudentLayout({ children }) {
   const navigate = useNavigate();
@@ -16,6 +17,7 @@ function StudentLayout({ children }) {
     localStorage.removeItem("studentName");
     localStorage.removeItem("studentId");
     // Remove any other keys if needed
+    clearSession();
     navigate("/login");
   };
 
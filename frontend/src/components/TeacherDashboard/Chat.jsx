@@ -1,5 +1,6 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import axios from "axios";
+import useMessageStream from "../useMessageStream";
 
 function Chat() {
   // Retrieve teacher's user ID (from Users table) and teacher's table ID from localStorage.
@@ -39,50 +40,56 @@ function Chat() {
     }
   }, [teacherId]);
 
-  // 2. Helper: Fetch unread count for a given student using the dedicated teacher endpoint.
-  const fetchUnreadCount = async (studentUserId) => {
+  // Refs for the stream handlers, which outlive a single render
+  const selectedRef = useRef(null);
+  const lastMessageIdRef = useRef(null);
+  selectedRef.current = selectedStudent;
+
+  // 2. Fetch every unread count for this teacher in one call.
+  const fetchUnreadCounts = async () => {
     try {
-      const res = await axios.get("http://127.0.0.1:5000/messages/unread_count/teacher", {
-        params: {
-          teacher_id: teacherUserId,    // teacher’s user_id
-          student_id: studentUserId,      // student’s user_id
-        },
+      const res = await axios.get("http://127.0.0.1:5000/messages/unread_counts", {
+        params: { user_id: teacherUserId },
       });
-      return res.data.unread_count;
+      const counts = {};
+      for (const row of res.data.unread_counts) {
+        counts[row.sender_id] = row.unread_count;
+      }
+      setUnreadCounts(counts);
     } catch (err) {
-      console.error("Error fetching unread count:", err);
-      return 0;
+      console.error("Error fetching unread counts:", err);
     }
   };
 
-  // 3. Fetch unread counts for all students.
   useEffect(() => {
-    const fetchAllUnreadCounts = async () => {
-      const counts = {};
-      for (const student of students) {
-        const count = await fetchUnreadCount(student.user_id);
-        counts[student.user_id] = count;
-      }
-      setUnreadCounts(counts);
-    };
-
-    if (students.length) {
-      fetchAllUnreadCounts();
+    if (teacherUserId) {
+      fetchUnreadCounts();
     }
-  }, [students, teacherUserId]);
+  }, [teacherUserId]);
+
+  // 3. Add messages to the open conversation, skipping ones already shown.
+  const appendMessages = (newMessages) => {
+    if (!newMessages.length) return;
+    lastMessageIdRef.current = Math.max(lastMessageIdRef.current || 0, ...newMessages.map((m) => m.id));
+    setMessages((prev) => {
+      const seen = new Set(prev.map((m) => m.id));
+      return [...prev, ...newMessages.filter((m) => !seen.has(m.id))];
+    });
+  };
 
   // 4. Define a function to mark messages as read using the teacher endpoint.
   const markMessagesAsRead = async () => {
+    const student = selectedRef.current;
     try {
-      if (selectedStudent) {
+      if (student) {
         await axios.patch("http://127.0.0.1:5000/messages/mark_read/teacher", {
           teacher_id: teacherUserId,
-          student_id: selectedStudent.user_id,
+          student_id: student.user_id,
         });
         // Reset unread count for the selected student.
         setUnreadCounts((prev) => ({
           ...prev,
-          [selectedStudent.user_id]: 0,
+          [student.user_id]: 0,
         }));
       }
     } catch (err) {
@@ -90,7 +97,7 @@ function Chat() {
     }
   };
 
-  // 5. Fetch messages for the selected conversation.
+  // 5. Fetch the whole conversation with the selected student.
   const fetchMessages = async () => {
     setError("");
     try {
@@ -100,6 +107,7 @@ function Chat() {
           student_id: selectedStudent.user_id,
         },
       });
+      lastMessageIdRef.current = res.data.length ? res.data[res.data.length - 1].id : 0;
       setMessages(res.data);
     } catch (err) {
       console.error("Error fetching messages:", err);
@@ -107,29 +115,66 @@ function Chat() {
     }
   };
 
-  // 6. When a teacher selects a student, fetch messages and mark incoming messages (from student) as read.
+  // 6. Fetch only the messages newer than the last one shown (since_id delta).
+  const fetchNewMessages = async () => {
+    const student = selectedRef.current;
+    if (!student || lastMessageIdRef.current === null) return;
+    try {
+      const res = await axios.get("http://127.0.0.1:5000/messages", {
+        params: {
+          teacher_id: teacherUserId,
+          student_id: student.user_id,
+          since_id: lastMessageIdRef.current,
+        },
+      });
+      if (selectedRef.current === student) {
+        appendMessages(res.data.messages);
+        if (res.data.messages.some((m) => m.sender_id === student.user_id)) {
+          markMessagesAsRead();
+        }
+      }
+    } catch (err) {
+      console.error("Error fetching new messages:", err);
+    }
+  };
+
+  // 7. When a teacher selects a student, fetch messages and mark incoming messages (from student) as read.
   useEffect(() => {
     if (selectedStudent) {
+      lastMessageIdRef.current = null;
       fetchMessages();
       markMessagesAsRead();
     }
   }, [selectedStudent, teacherUserId]);
 
-  // 7. Set up polling to periodically refresh messages and mark as read.
-  useEffect(() => {
-    let interval;
-    if (selectedStudent) {
-      interval = setInterval(() => {
-        fetchMessages();
+  // 8. New messages and unread counts are pushed by the server; after a
+  // reconnect (or while the stream is unavailable) catch up with a delta.
+  useMessageStream(teacherUserId, {
+    onMessage: (msg) => {
+      const student = selectedRef.current;
+      if (!student || (msg.sender_id !== student.user_id && msg.receiver_id !== student.user_id)) return;
+      if (msg.truncated) {
+        fetchNewMessages();
+        return;
+      }
+      appendMessages([msg]);
+      if (msg.sender_id === student.user_id) {
         markMessagesAsRead();
-      }, 5000); // poll every 5 seconds
-    }
-    return () => {
-      if (interval) clearInterval(interval);
-    };
-  }, [selectedStudent, teacherUserId]);
+      }
+    },
+    onUnread: ({ peer_id, unread_count }) => {
+      const student = selectedRef.current;
+      // The open conversation is marked read as its messages arrive
+      if (student && student.user_id === peer_id) return;
+      setUnreadCounts((prev) => ({ ...prev, [peer_id]: unread_count }));
+    },
+    onCatchUp: () => {
+      fetchNewMessages();
+      fetchUnreadCounts();
+    },
+  });
 
-  // 8. Handle sending a new message.
+  // 9. Handle sending a new message.
   const handleSendMessage = async () => {
     if (!newMessage.trim()) return;
     try {
@@ -139,9 +184,8 @@ function Chat() {
         message: newMessage,
       });
       setNewMessage("");
-      fetchMessages();
-      // Optionally, call markMessagesAsRead after sending.
-      markMessagesAsRead();
+      // Shows it right away even if the stream is down
+      fetchNewMessages();
     } catch (err) {
       console.error("Error sending message:", err);
       setError("Failed to send message.");
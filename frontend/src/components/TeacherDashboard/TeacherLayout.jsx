@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
+import { clearSession } from "../../auth";
 
 function TeacherLayout({ children }) {
   const navigate = useNavigate();
@@ -16,6 +17,7 @@ function TeacherLayout({ children }) {
     localStorage.removeItem("teacherName");
     localStorage.removeItem("teacherId");
     // Remove other keys if necessary
+    clearSession();
     navigate("/login");
   };
 
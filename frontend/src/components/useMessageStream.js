@@ -0,0 +1,55 @@
+import { useEffect, useRef } from "react";
+import { API_URL, withAccessToken } from "../auth";
+
+// Chat events for one user (users.id) pushed over GET /messages/stream
+// (Server-Sent Events). handlers.onMessage gets each new message sent to or
+// by the user, handlers.onUnread {peer_id, unread_count} and handlers.onRead
+// {reader_id}. handlers.onCatchUp runs whenever the stream (re)opens, so the
+// caller can fetch what it missed, and every pollInterval ms while the
+// server refuses the stream (e.g. 503 at its connection limit).
+export default function useMessageStream(userId, handlers, pollInterval = 5000) {
+  const handlersRef = useRef(handlers);
+  handlersRef.current = handlers;
+
+  useEffect(() => {
+    if (!userId) return undefined;
+    let source = null;
+    let pollTimer = null;
+    let retryTimer = null;
+    let closed = false;
+
+    const call = (name, payload) => {
+      const handler = handlersRef.current[name];
+      if (handler) handler(payload);
+    };
+
+    const connect = () => {
+      source = new EventSource(withAccessToken(`${API_URL}/messages/stream?user_id=${userId}`));
+      source.onopen = () => {
+        if (pollTimer) {
+          clearInterval(pollTimer);
+          pollTimer = null;
+        }
+        call("onCatchUp");
+      };
+      source.addEventListener("message", (e) => call("onMessage", JSON.parse(e.data).message));
+      source.addEventListener("unread", (e) => call("onUnread", JSON.parse(e.data)));
+      source.addEventListener("read", (e) => call("onRead", JSON.parse(e.data)));
+      source.onerror = () => {
+        // Dropped connections are retried by EventSource itself; a refused
+        // one closes it, so poll until a later attempt gets a stream
+        if (closed || source.readyState !== EventSource.CLOSED) return;
+        if (!pollTimer) pollTimer = setInterval(() => call("onCatchUp"), pollInterval);
+        retryTimer = setTimeout(connect, 30000);
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      if (source) source.close();
+      if (pollTimer) clearInterval(pollTimer);
+      if (retryTimer) clearTimeout(retryTimer);
+    };
+  }, [userId, pollInterval]);
+}
@@ -4,6 +4,7 @@ import ReactDOM from "react-dom/client";
 import { BrowserRouter } from "react-router-dom";
 
 import App from "./App";
+import "./auth";
 import "./index.css";
 
 const root = ReactDOM.createRoot(document.getElementById("root"));
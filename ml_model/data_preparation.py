@@ -1,65 +1,296 @@
+"""
+Training pipeline for the student performance model.
+
+    python data_preparation.py [--data student_grades.csv] [--n-jobs -1] ...
+
+Runs a cross-validated grid search over RandomForestRegressor settings,
+refits the best one, and writes a versioned artifact directory
+(artifacts/<version>/ with model.pkl, model.npz and metadata.json holding
+the metrics and the feature schema). The model is also published as
+final_student_model.pkl/.npz, which the backend loads.
+
+Every (parameters, fold) fit runs on a joblib process pool and its score is
+cached on disk (joblib.Memory, keyed by the fold's data and the
+parameters), so a rerun on the same data only fits new grid points. Rows
+are assigned to the test split and to CV folds by a hash of their
+StudentID, not by shuffling, so adding rows never moves existing ones
+between splits or folds. Any change to the data still refits every fold,
+though: each row is in the training data of all folds but its own.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
+import sklearn
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
 
-# ------------------------------
-# Step 1: Load and Inspect the Data
-# ------------------------------
-
-# Load the CSV file (ensure that student_grades.csv is in the same directory)
-data = pd.read_csv("student_grades.csv")
-print("Data head:")
-print(data.head())
-
-# ------------------------------
-# Step 2: Preprocess and Split the Data
-# ------------------------------
+HERE = os.path.dirname(os.path.abspath(__file__))
 
-# Select features (X) and target (y)
 # Features: AttendancePercent, ParticipationScore, PastGrade
 # Target: FinalGrade
-X = data[['AttendancePercent', 'ParticipationScore', 'PastGrade']]
-y = data['FinalGrade']
+FEATURES = ['AttendancePercent', 'ParticipationScore', 'PastGrade']
+TARGET = 'FinalGrade'
+# Stable row id for split and fold assignment
+ID_COLUMN = 'StudentID'
+
+PARAM_GRID = {
+    "n_estimators": [100, 200],
+    "max_depth": [None, 8, 16],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": [1.0, "sqrt"],
+}
+
 
-# Optionally, check basic statistics for insight
-print("\nData statistics:")
-print(data.describe())
+def export_forest(forest, filename):
+    """
+    Flatten every tree of a fitted RandomForestRegressor into contiguous
+    arrays (feature, threshold, left, right, value) and save them as .npz.
+    Child indices are global, and roots holds each tree's first node.
+    The backend serves predictions from this file with forest_engine.CompiledForest.
+    """
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        roots.append(offset)
+        features.append(tree.feature)
+        thresholds.append(tree.threshold)
+        lefts.append(np.where(is_leaf, -1, tree.children_left + offset))
+        rights.append(np.where(is_leaf, -1, tree.children_right + offset))
+        values.append(tree.value[:, 0, 0])
+        offset += tree.node_count
+
+    np.savez(
+        filename,
+        feature=np.concatenate(features).astype(np.int32),
+        threshold=np.concatenate(thresholds).astype(np.float64),
+        left=np.concatenate(lefts).astype(np.int32),
+        right=np.concatenate(rights).astype(np.int32),
+        value=np.concatenate(values).astype(np.float64),
+        roots=np.array(roots, dtype=np.int32),
+        max_depth=max(estimator.tree_.max_depth for estimator in forest.estimators_),
+        feature_names=np.array(getattr(forest, "feature_names_in_", []), dtype=str)
+    )
 
-# Split the data (80% training, 20% testing)
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-print("\nTraining set size:", X_train.shape)
-print("Testing set size:", X_test.shape)
 
 # ------------------------------
-# Step 3: Train the Random Forest Model
+# Data
 # ------------------------------
 
-# Initialize and train the model
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
+def load_data(path):
+    """
+    Read the training CSV and return (X, y, row ids, sha256 of the file).
+    Rows are identified by ID_COLUMN, or by their values when it is absent.
+    """
+    with open(path, "rb") as data_file:
+        digest = hashlib.sha256(data_file.read()).hexdigest()
+    data = pd.read_csv(path, encoding="utf-8-sig")
+    missing = [column for column in FEATURES + [TARGET] if column not in data.columns]
+    if missing:
+        raise ValueError(f"{path} is missing column(s): {', '.join(missing)}")
+    data = data.dropna(subset=FEATURES + [TARGET])
+    if ID_COLUMN in data.columns:
+        ids = data[ID_COLUMN].astype(str)
+    else:
+        ids = data[FEATURES + [TARGET]].astype(str).agg(",".join, axis=1)
+    return data[FEATURES], data[TARGET], ids.to_numpy(), digest
+
+
+def row_buckets(ids, buckets, salt):
+    """
+    Bucket in [0, buckets) of every row id, from a hash of (salt, id), so a
+    row's bucket depends on nothing but its own id.
+    """
+    return np.array([
+        int.from_bytes(hashlib.sha256(f"{salt}:{row_id}".encode()).digest()[:8], "big") % buckets
+        for row_id in ids
+    ], dtype=np.int64)
+
+
+def feature_schema(X):
+    """Name, dtype and observed range of every feature, in model input order."""
+    return [
+        {
+            "name": column,
+            "dtype": str(X[column].dtype),
+            "min": float(X[column].min()),
+            "max": float(X[column].max()),
+        }
+        for column in X.columns
+    ]
+
 
 # ------------------------------
-# Step 4: Evaluate the Model
+# Cross-validated search
 # ------------------------------
 
-# Make predictions on the test set
-predictions = model.predict(X_test)
+def param_candidates(grid):
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
 
-# Calculate evaluation metrics
-mse = mean_squared_error(y_test, predictions)
-r2 = r2_score(y_test, predictions)
 
-print("\nRandom Forest Regressor Results:")
-print(f"Mean Squared Error (MSE): {mse:.2f}")
-print(f"R-squared (R2): {r2:.2f}")
+def score_fold(params, X_train, y_train, X_valid, y_valid, seed):
+    """Fit one candidate on one fold and return its validation MSE."""
+    # n_jobs=1: the parallelism is across fits, not inside them
+    model = RandomForestRegressor(random_state=seed, n_jobs=1, **params)
+    model.fit(X_train, y_train)
+    return float(mean_squared_error(y_valid, model.predict(X_valid)))
+
+
+def cross_validated_search(X, y, grid, folds=5, n_jobs=-1, cache_dir=None, seed=42, verbose=0, ids=None):
+    """
+    Score every grid candidate with K-fold cross-validation, assigning rows
+    to folds by a hash of their ids (default: X's index). All fits run in
+    parallel on a process pool; with cache_dir, fold scores are memoized so
+    unchanged (parameters, fold) pairs are not refit. Returns one result per
+    candidate, best (lowest mean RMSE) first.
+    """
+    memory = joblib.Memory(cache_dir, verbose=0)
+    cached_score = memory.cache(score_fold)
+    candidates = param_candidates(grid)
+    fold_of = row_buckets(X.index if ids is None else ids, folds, f"fold:{seed}")
+    splits = [(np.flatnonzero(fold_of != fold), np.flatnonzero(fold_of == fold)) for fold in range(folds)]
+    if any(not len(valid) for _, valid in splits):
+        raise ValueError(f"{len(X)} rows are too few for {folds} folds")
+    X_values, y_values = np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)
+
+    scores = joblib.Parallel(n_jobs=n_jobs, backend="loky", verbose=verbose)(
+        joblib.delayed(cached_score)(
+            params, X_values[train], y_values[train], X_values[valid], y_values[valid], seed
+        )
+        for params in candidates
+        for train, valid in splits
+    )
+
+    results = []
+    for index, params in enumerate(candidates):
+        rmse = np.sqrt(scores[index * folds:(index + 1) * folds])
+        results.append({"params": params, "cv_rmse_mean": float(rmse.mean()), "cv_rmse_std": float(rmse.std())})
+    results.sort(key=lambda result: result["cv_rmse_mean"])
+    return results
+
 
 # ------------------------------
-# Step 5: Save the Trained Model
+# Training and artifacts
 # ------------------------------
 
-model_filename = "final_student_model.pkl"
-joblib.dump(model, model_filename)
-print(f"\nModel saved as {model_filename}")
+def train(data_path, grid=PARAM_GRID, folds=5, test_size=0.2, n_jobs=-1, cache_dir=None, seed=42, verbose=0):
+    """
+    Search on the training split, refit the best candidate on it and score
+    it on the held-out split. Returns (model, metadata).
+    """
+    X, y, ids, data_sha256 = load_data(data_path)
+    # Same hashed assignment as the folds: a row stays on its side of the split as rows are added
+    held_out = row_buckets(ids, 1000, f"test:{seed}") < round(test_size * 1000)
+    X_train, X_test, y_train, y_test = X[~held_out], X[held_out], y[~held_out], y[held_out]
+
+    results = cross_validated_search(X_train, y_train, grid, folds, n_jobs, cache_dir, seed, verbose,
+                                     ids=ids[~held_out])
+    best = results[0]
+
+    model = RandomForestRegressor(random_state=seed, n_jobs=n_jobs, **best["params"])
+    model.fit(X_train, y_train)
+    model.n_jobs = None  # serve single-threaded
+    predictions = model.predict(X_test)
+
+    fingerprint = hashlib.sha256(
+        json.dumps([data_sha256, best["params"], seed], sort_keys=True).encode()
+    ).hexdigest()[:8]
+    trained_at = datetime.now(timezone.utc)
+    metadata = {
+        "version": f"{trained_at:%Y%m%dT%H%M%SZ}-{fingerprint}",
+        "trained_at": trained_at.isoformat(),
+        "estimator": "RandomForestRegressor",
+        "params": best["params"],
+        "features": feature_schema(X),
+        "target": TARGET,
+        "data": {
+            "path": os.path.basename(data_path),
+            "sha256": data_sha256,
+            "rows": int(len(X)),
+            "train_rows": int(len(X_train)),
+            "test_rows": int(len(X_test)),
+        },
+        "metrics": {
+            "cv_folds": folds,
+            "cv_rmse_mean": best["cv_rmse_mean"],
+            "cv_rmse_std": best["cv_rmse_std"],
+            "test_mse": float(mean_squared_error(y_test, predictions)),
+            "test_mae": float(mean_absolute_error(y_test, predictions)),
+            "test_r2": float(r2_score(y_test, predictions)),
+        },
+        "search": results,
+        "seed": seed,
+        "sklearn_version": sklearn.__version__,
+    }
+    return model, metadata
+
+
+def save_artifact(model, metadata, artifacts_dir, publish_dir=None):
+    """
+    Write artifacts_dir/<version>/{model.pkl, model.npz, metadata.json} and,
+    with publish_dir, copy them to the final_student_model.* files the
+    backend loads. Returns the artifact directory.
+    """
+    artifact_dir = os.path.join(artifacts_dir, metadata["version"])
+    os.makedirs(artifact_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(artifact_dir, "model.pkl"))
+    export_forest(model, os.path.join(artifact_dir, "model.npz"))
+    with open(os.path.join(artifact_dir, "metadata.json"), "w") as metadata_file:
+        json.dump(metadata, metadata_file, indent=2)
+
+    if publish_dir:
+        for source, target in (("model.pkl", "final_student_model.pkl"),
+                               ("model.npz", "final_student_model.npz"),
+                               ("metadata.json", "final_student_model.json")):
+            shutil.copyfile(os.path.join(artifact_dir, source), os.path.join(publish_dir, target))
+    return artifact_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the student performance model.")
+    parser.add_argument("--data", default=os.path.join(HERE, "student_grades.csv"), help="Training CSV.")
+    parser.add_argument("--artifacts-dir", default=os.path.join(HERE, "artifacts"),
+                        help="Where versioned artifacts are written.")
+    parser.add_argument("--publish-dir", default=os.path.join(HERE, "..", "backend"),
+                        help="Also copy the model here as final_student_model.* (default: the backend); '' to skip.")
+    parser.add_argument("--cache-dir", default=os.path.join(HERE, ".cache"),
+                        help="Fold score cache; '' to disable.")
+    parser.add_argument("--grid", default=None,
+                        help="JSON object overriding the parameter grid, e.g. '{\"n_estimators\": [100, 300]}'.")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel fits; -1 uses every core.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    grid = dict(PARAM_GRID)
+    if args.grid:
+        grid.update(json.loads(args.grid))
+
+    model, metadata = train(args.data, grid, args.folds, args.test_size, args.n_jobs,
+                            args.cache_dir or None, args.seed, args.verbose)
+    artifact_dir = save_artifact(model, metadata, args.artifacts_dir, args.publish_dir or None)
+
+    metrics = metadata["metrics"]
+    print("Best parameters:", json.dumps(metadata["params"], sort_keys=True))
+    print(f"Cross-validated RMSE: {metrics['cv_rmse_mean']:.2f} (+/- {metrics['cv_rmse_std']:.2f})")
+    print(f"Test Mean Squared Error (MSE): {metrics['test_mse']:.2f}")
+    print(f"Test R-squared (R2): {metrics['test_r2']:.2f}")
+    print(f"Artifact {metadata['version']} saved in {artifact_dir}")
+    if args.publish_dir:
+        print(f"Published as final_student_model.pkl/.npz in {os.path.abspath(args.publish_dir)}")
+
+
+if __name__ == "__main__":
+    main()